@@ -1,6 +1,7 @@
 import os
 import json
 import time
+import httpx
 import requests
 import streamlit as st
 
@@ -91,21 +92,71 @@ with st.sidebar:
 if "messages" not in st.session_state:
     st.session_state.messages = []  # list of dicts: {role: "user"/"assistant", content: str, citations: [...]}
 
-def post_json(url: str, payload: dict) -> requests.Response:
-    """POST JSON with optional AWS SigV4 signing."""
+@st.cache_resource
+def _httpx_client() -> httpx.Client:
+    """One pooled HTTP/2 client for the whole app so reruns reuse the connection."""
+    return httpx.Client(
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+        timeout=60,
+    )
+
+
+@st.cache_resource
+def _http_session() -> requests.Session:
+    """Pooled requests Session, kept for the SigV4 path (requests-aws4auth
+    only plugs into requests)."""
+    return requests.Session()
+
+
+def _sigv4_auth(region: str, service: str):
+    """Build the SigV4 auth object once per (region, service, key) and reuse it,
+    so the signing-key derivation chain isn't redone on every send."""
+    if AWS4Auth is None or boto3 is None:
+        raise RuntimeError("requests-aws4auth and boto3 are required for SigV4. Install with: pip install requests-aws4auth boto3")
+    session = st.session_state.get("_aws_session")
+    if session is None or st.session_state.get("_aws_region") != region:
+        session = boto3.Session(region_name=region or None)
+        st.session_state["_aws_session"] = session
+        st.session_state["_aws_region"] = region
+    creds = session.get_credentials()
+    if creds is None:
+        raise RuntimeError("No AWS credentials found (profile/ENV). Configure AWS CLI or env vars.")
+    cache_key = (region, service, creds.access_key)
+    if st.session_state.get("_awsauth_key") != cache_key:
+        st.session_state["_awsauth"] = AWS4Auth(creds.access_key, creds.secret_key, region, service, session_token=creds.token)
+        st.session_state["_awsauth_key"] = cache_key
+    return st.session_state["_awsauth"]
+
+
+def post_json(url: str, payload: dict):
+    """POST JSON with optional AWS SigV4 signing. Returns a requests or httpx
+    Response; both expose .raise_for_status() and .json()."""
     headers = {"Content-Type": "application/json"}
 
     if auth_mode == "AWS SigV4":
-        if AWS4Auth is None or boto3 is None:
-            raise RuntimeError("requests-aws4auth and boto3 are required for SigV4. Install with: pip install requests-aws4auth boto3")
-        session = boto3.Session(region_name=aws_region or None)
-        creds = session.get_credentials()
-        if creds is None:
-            raise RuntimeError("No AWS credentials found (profile/ENV). Configure AWS CLI or env vars.")
-        awsauth = AWS4Auth(creds.access_key, creds.secret_key, aws_region, aws_service, session_token=creds.token)
-        return requests.post(url, headers=headers, data=json.dumps(payload), auth=awsauth, timeout=60)
+        awsauth = _sigv4_auth(aws_region, aws_service)
+        return _http_session().post(url, headers=headers, data=json.dumps(payload), auth=awsauth, timeout=60)
     else:
-        return requests.post(url, headers=headers, data=json.dumps(payload), timeout=60)
+        return _httpx_client().post(url, headers=headers, content=json.dumps(payload))
+
+
+def _iter_sse_tokens(resp):
+    """Yield text pieces from an SSE response ('data: ...' lines)."""
+    for line in resp.iter_lines():
+        if not line or not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if not data or data == "{}":
+            continue
+        try:
+            evt = json.loads(data)
+        except Exception:
+            yield data
+            continue
+        piece = evt.get("delta") or evt.get("text") or evt.get("answer")
+        if isinstance(piece, str):
+            yield piece
 
 
 def render_citations(citations):
@@ -146,24 +197,45 @@ if user_input:
         "polish": polish,
     }
 
-    # call agent
+    # call agent — stream tokens when the endpoint speaks SSE so the UI shows
+    # text at first-byte time instead of blocking on the full completion
+    answer = None
+    citations = []
+    data = None
     try:
-        resp = post_json(agent_url, payload)
-        resp.raise_for_status()
-        data = resp.json()
+        if auth_mode == "AWS SigV4":
+            # SigV4 signing needs the whole body up front; keep the blocking path
+            resp = post_json(agent_url, payload)
+            resp.raise_for_status()
+            data = resp.json()
+        else:
+            with _httpx_client().stream(
+                "POST", agent_url,
+                headers={"Content-Type": "application/json"},
+                content=json.dumps(payload),
+            ) as r:
+                r.raise_for_status()
+                if r.headers.get("content-type", "").startswith("text/event-stream"):
+                    with st.chat_message("assistant"):
+                        answer = st.write_stream(_iter_sse_tokens(r)) or ""
+                else:
+                    # single JSON blob: fall back to the non-streaming rendering
+                    r.read()
+                    data = r.json()
     except Exception as e:
         with st.chat_message("assistant"):
             st.error(f"Request failed: {e}")
         st.stop()
 
-    # Figure out the shape of the response (your agent typically returns {answer, citations})
-    answer = extract_answer_text(data)
-    citations = data.get("citations") or data.get("result", {}).get("citations") or []
+    if data is not None:
+        # Figure out the shape of the response (your agent typically returns {answer, citations})
+        answer = extract_answer_text(data)
+        citations = data.get("citations") or data.get("result", {}).get("citations") or []
 
-    with st.chat_message("assistant"):
-        st.markdown(answer)
-        render_citations(citations)
-        if show_raw:
-            st.code(json.dumps(data, indent=2), language="json")
+        with st.chat_message("assistant"):
+            st.markdown(answer)
+            render_citations(citations)
+            if show_raw:
+                st.code(json.dumps(data, indent=2), language="json")
 
     st.session_state.messages.append({"role": "assistant", "content": answer, "citations": citations})
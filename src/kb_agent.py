@@ -1,14 +1,22 @@
 from __future__ import annotations
 
 import os
-import json
 import time
-import uuid
+import asyncio
+import secrets
 import hmac
+import socket
 import hashlib
-from typing import Any, Dict, List, Optional
-
-import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import aioboto3
+import httpx
+import msgspec
+import orjson
+import simdjson
 import boto3
 from botocore.config import Config
 
@@ -27,119 +35,313 @@ KB_ID = os.getenv("KB_ID")
 MODEL_ID = os.getenv("MODEL_ID")  # used for Bedrock fallback (and possibly by Strands if it reads env)
 TOP_K = int(os.getenv("TOP_K", "8"))
 MIN_SCORE = float(os.getenv("MIN_SCORE", "0.0"))
+CACHE_TTL = int(os.getenv("CACHE_TTL", "300"))
 PORT = int(os.getenv("PORT", "8080"))
 
-# Optional: allow reading KB_ID from SSM if not provided via env
-if not KB_ID and os.getenv("USE_SSM_PARAMS", "0") == "1":
+# Optional: allow reading KB_ID from SSM if not provided via env. Resolution
+# is lazy so container startup never blocks on STS+SSM round trips; the first
+# invoke pays it once and warm restarts reuse the /tmp cache without any call.
+_KB_ID_CACHE_FILE = "/tmp/kb_id.cache"
+_KB_ID_CACHE_TTL = 300  # seconds
+
+
+@lru_cache(maxsize=1)
+def _get_kb_id() -> str:
+    if KB_ID:
+        return KB_ID
+    if os.getenv("USE_SSM_PARAMS", "0") != "1":
+        raise RuntimeError("Missing KB_ID. Set env KB_ID or enable SSM (USE_SSM_PARAMS=1).")
+
+    try:
+        st = os.stat(_KB_ID_CACHE_FILE)
+        if time.time() - st.st_mtime < _KB_ID_CACHE_TTL:
+            with open(_KB_ID_CACHE_FILE) as f:
+                cached = f.read().strip()
+            if cached:
+                return cached
+    except OSError:
+        pass
+
     ssm = boto3.client("ssm", region_name=REGION)
     sts = boto3.client("sts")
     acct = sts.get_caller_identity()["Account"]
     prefix = os.getenv("SSM_PARAM_PREFIX", f"/{acct}-{REGION}/kb")
     try:
-        KB_ID = ssm.get_parameter(Name=f"{prefix}/knowledge-base-id")["Parameter"]["Value"]
+        kb_id = ssm.get_parameter(Name=f"{prefix}/knowledge-base-id")["Parameter"]["Value"]
     except Exception as e:
         raise RuntimeError(
             f"KB_ID is not set and could not be read from SSM at {prefix}/knowledge-base-id: {e}"
         )
+    try:
+        with open(_KB_ID_CACHE_FILE, "w") as f:
+            f.write(kb_id)
+    except OSError:
+        pass
+    return kb_id
+
 
-if not KB_ID:
-    raise RuntimeError("Missing KB_ID. Set env KB_ID or enable SSM (USE_SSM_PARAMS=1).")
 if not MODEL_ID:
     # Only needed for the Bedrock fallback; Strands may pick a default model via its own config.
     # We'll keep it required so both paths are well-defined.
     raise RuntimeError("Missing MODEL_ID. Set your Bedrock model id (e.g., anthropic.claude-3-5-sonnet-20240620-v1:0).")
 
-# Bedrock Agent Runtime client for KB retrieval
-runtime = boto3.client(
-    "bedrock-agent-runtime",
-    region_name=REGION,
-    config=Config(retries={"max_attempts": 3, "mode": "adaptive"}),
+# Default botocore pools cap at 10 connections and re-handshake TLS on
+# overflow; size the pool for concurrent invokes and keep sockets alive.
+_BOTO_CONFIG = Config(
+    retries={"max_attempts": 3, "mode": "adaptive"},
+    max_pool_connections=int(os.getenv("BOTO_POOL", "64")),
+    tcp_keepalive=True,
+    connect_timeout=3,
+    read_timeout=60,
 )
 
-# Bedrock Runtime client for LLM fallback (generation)
-brt = boto3.client(
-    "bedrock-runtime",
-    region_name=REGION,
-    config=Config(retries={"max_attempts": 3, "mode": "adaptive"}),
-)
+# Async Bedrock clients so concurrent invokes overlap their round-trips
+# instead of serializing on a blocking socket. Opened once on first use and
+# held for the process lifetime.
+_aio_session = aioboto3.Session()
+_aio_runtime: Any = None
+_aio_brt: Any = None
+_CLIENTS_LOCK = asyncio.Lock()
+
+
+async def _get_clients():
+    """Return the (agent-runtime, runtime) async clients, opening them once."""
+    global _aio_runtime, _aio_brt
+    if _aio_runtime is None:
+        async with _CLIENTS_LOCK:
+            if _aio_runtime is None:
+                _aio_brt = await _aio_session.client(
+                    "bedrock-runtime", region_name=REGION, config=_BOTO_CONFIG
+                ).__aenter__()
+                _aio_runtime = await _aio_session.client(
+                    "bedrock-agent-runtime", region_name=REGION, config=_BOTO_CONFIG
+                ).__aenter__()
+    return _aio_runtime, _aio_brt
+
+
+def _warm() -> None:
+    """Best-effort pre-warm: resolve the credential chain and the Bedrock
+    endpoints' DNS in the background so the first invoke doesn't pay them.
+    Also probes Strands here — a tiny real generation, but off the request
+    and startup paths; until it fails, Strands is assumed usable."""
+    global _STRANDS_OK
+    try:
+        boto3.Session().get_credentials()
+        for host in (
+            f"bedrock-agent-runtime.{REGION}.amazonaws.com",
+            f"bedrock-runtime.{REGION}.amazonaws.com",
+        ):
+            socket.getaddrinfo(host, 443)
+    except Exception:
+        pass
+    if _STRANDS_OK:
+        try:
+            agent("ping")
+        except Exception:
+            _STRANDS_OK = False
+
+
+# Result timestamps only need second precision, so a ticker thread refreshes
+# one cached value instead of each request making its own time() syscalls.
+_NOW = [int(time.time())]
+
+
+def _tick() -> None:
+    while True:
+        time.sleep(1)
+        _NOW[0] = int(time.time())
+
+
+threading.Thread(target=_tick, daemon=True).start()
 
 # Strands agent — simple callable
 # (Strands typically reads provider/model from its own config or env; we won't over-configure it here.)
 agent = StrandsAgent()
 
+# Optimistic flag, cleared by the probe in _warm if Strands turns out to be
+# misconfigured; a broken Strands otherwise costs a doomed setup + exception
+# on every request. STRANDS_DISABLED=1 force-skips the Strands path entirely.
+_STRANDS_OK = os.getenv("STRANDS_DISABLED", "0") != "1"
+
+threading.Thread(target=_warm, daemon=True).start()
+
 SYSTEM_PROMPT = (
     "You are a precise enterprise assistant. You receive: (a) the user's question, "
     "(b) KB excerpts, and (c) optional pre-baked KB answer text. Answer ONLY using "
     "the KB information. Add short inline citations like [1], [2]. If nothing relevant "
     "is found, say so clearly and suggest a follow-up. Keep answers concise."
 )
+_SYSTEM_HEADER = "SYSTEM:\n" + SYSTEM_PROMPT + "\n\n"
+
+# One translate() pass replaces chained .replace() allocations per snippet.
+_WS_TABLE = str.maketrans({"\n": " ", "\r": " ", "\t": " "})
+
+
+# -----------------------------
+# Query cache
+# -----------------------------
+class QueryCache:
+    """Bounded TTL cache: key -> (value, expiry). When full, the entries
+    closest to expiry (oldest 10%) are evicted in one sweep so a single
+    insert never thrashes."""
+
+    def __init__(self, max_size: int = 1000, default_ttl: float = 3600):
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self._data: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expiry = entry
+            if expiry < time.time():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expiry = time.time() + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            if len(self._data) >= self.max_size:
+                oldest = sorted(self._data.items(), key=lambda kv: kv[1][1])
+                for k, _ in oldest[: max(1, self.max_size // 10)]:
+                    del self._data[k]
+            self._data[key] = (value, expiry)
+
+
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", str(CACHE_TTL)))
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1000"))
+
+# Two tiers keyed identically: a synthesis miss can still reuse cached chunks.
+_retrieve_cache = QueryCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL)
+_answer_cache = QueryCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL)
+
+
+def _query_cache_key(query: str, top_k: int, min_score: float) -> str:
+    raw = f"{query.lower().strip()}|{top_k}|{min_score}|{MODEL_ID}|{_get_kb_id()}"
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
 
 
 # -----------------------------
 # KB Retrieval helpers
 # -----------------------------
-def kb_retrieve(query: str, *, top_k: int, min_score: float) -> Dict[str, Any]:
+
+
+class Chunk(NamedTuple):
+    """One retrieved KB excerpt. A NamedTuple instead of a 4-key dict: no
+    per-chunk hash table, and downstream consumers use attribute access."""
+
+    text: str
+    score: Optional[float]
+    title: Optional[str]
+    url: Optional[str]
+
+
+async def kb_retrieve(query: str, *, top_k: int, min_score: float) -> Dict[str, Any]:
     """
     Retrieve KB chunks WITHOUT generation using `retrieve`.
     Falls back to `retrieve_and_generate` when `retrieve` is unavailable.
     Returns a dict: {chunks, citations, rag_text, mode}
     """
+    cache_key = _query_cache_key(query, top_k, min_score)
+    cached = _retrieve_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    kb_id = _get_kb_id()
+    runtime, _ = await _get_clients()
+
     # Primary path: KB retrieve (no generation)
     try:
-        resp = runtime.retrieve(
-            knowledgeBaseId=KB_ID,
+        resp = await runtime.retrieve(
+            knowledgeBaseId=kb_id,
             retrievalQuery={"text": query},
             retrievalConfiguration={"vectorSearchConfiguration": {"numberOfResults": top_k}},
         )
-        chunks: List[Dict[str, Any]] = []
-        for item in resp.get("retrievalResults", []) or []:
+        results = resp.get("retrievalResults", []) or []
+        # Bedrock has no server-side score threshold on retrieve, but results
+        # come back score-ordered: sort defensively, then stop at the first
+        # item under min_score instead of scanning the rest.
+        results.sort(key=lambda r: r.get("score") or 0.0, reverse=True)
+        chunks: List[Chunk] = []
+        for item in results:
             md = item.get("metadata", {})
             text = (item.get("content") or {}).get("text") or ""
             score = item.get("score")
             if score is not None and score < min_score:
-                continue
+                break
             chunks.append(
-                {
-                    "text": text,
-                    "score": score,
-                    "title": md.get("title") or md.get("file") or md.get("source"),
-                    "url": md.get("url") or md.get("source"),
-                }
+                Chunk(
+                    text=text,
+                    score=score,
+                    title=md.get("title") or md.get("file") or md.get("source"),
+                    url=md.get("url") or md.get("source"),
+                )
             )
-        return {"chunks": chunks, "citations": chunks, "rag_text": None, "mode": "retrieve"}
+        ret = {"chunks": chunks, "citations": chunks, "rag_text": None, "mode": "retrieve"}
+        _retrieve_cache.set(cache_key, ret)
+        return ret
     except Exception:
         # Fallback: RAG (retrieve_and_generate)
         model_arn = f"arn:aws:bedrock:{REGION}::foundation-model/{MODEL_ID}"
-        rag = runtime.retrieve_and_generate(
+        rag = await runtime.retrieve_and_generate(
             input={"text": query},
             retrieveAndGenerateConfiguration={
                 "type": "KNOWLEDGE_BASE",
                 "knowledgeBaseConfiguration": {
-                    "knowledgeBaseId": KB_ID,
+                    "knowledgeBaseId": kb_id,
                     "modelArn": model_arn,   # <-- required in your account
                 },
             },
         )
         out_text = ((rag.get("output") or {}).get("text") or "").strip()
-        cites: List[Dict[str, Any]] = []
+        cites: List[Chunk] = []
         for c in (rag.get("citations") or []):
             for ref in c.get("retrievedReferences", []):
                 md = ref.get("metadata", {})
                 cites.append(
-                    {
-                        "text": (ref.get("content", {}) or {}).get("text"),
-                        "score": ref.get("score"),
-                        "title": md.get("title") or md.get("file") or md.get("source"),
-                        "url": md.get("url") or md.get("source"),
-                    }
+                    Chunk(
+                        text=(ref.get("content", {}) or {}).get("text") or "",
+                        score=ref.get("score"),
+                        title=md.get("title") or md.get("file") or md.get("source"),
+                        url=md.get("url") or md.get("source"),
+                    )
                 )
-        return {"chunks": cites, "citations": cites, "rag_text": out_text, "mode": "rag"}
+        ret = {"chunks": cites, "citations": cites, "rag_text": out_text, "mode": "rag"}
+        _retrieve_cache.set(cache_key, ret)
+        return ret
+
+
+def _dedupe_chunks(chunks: List[Chunk]) -> List[Chunk]:
+    """Drop near-duplicate chunks — same source+score bucket, or identical
+    text prefix — so redundant KB entries don't inflate prompt tokens."""
+    seen_keys = set()
+    seen_text = set()
+    out: List[Chunk] = []
+    for ch in chunks:
+        key = (ch.url or ch.title, round(ch.score or 0, 2))
+        digest = hashlib.blake2b((ch.text or "").encode("utf-8")[:64], digest_size=8).digest()
+        if key in seen_keys or digest in seen_text:
+            continue
+        seen_keys.add(key)
+        seen_text.add(digest)
+        out.append(ch)
+    return out
 
 
 # -----------------------------
 # LLM generation
 # -----------------------------
-def _bedrock_generate(prompt: str) -> str:
+# Reused parser: the response is parsed lazily and only the cited fields are
+# materialized, instead of building the whole payload as Python objects.
+_SIMD_PARSER = simdjson.Parser()
+
+
+
+async def _bedrock_generate(prompt: str) -> str:
     """
     Safety net if Strands isn't callable: call Bedrock Runtime directly (Anthropic Messages).
     """
@@ -150,47 +352,87 @@ def _bedrock_generate(prompt: str) -> str:
             "temperature": 0.2,
             "messages": [{"role": "user", "content": [{"type": "text", "text": prompt}]}],
         }
-        resp = brt.invoke_model(
+        _, brt = await _get_clients()
+
+        # Preferred: response streaming — text deltas are consumed as they
+        # arrive instead of buffering and parsing the whole body at the end.
+        try:
+            resp = await brt.invoke_model_with_response_stream(
+                modelId=MODEL_ID,
+                body=orjson.dumps(body),
+                contentType="application/json",
+                accept="application/json",
+            )
+            pieces: List[str] = []
+            async for event in resp["body"]:
+                chunk = orjson.loads(event["chunk"]["bytes"])
+                if chunk.get("type") == "content_block_delta":
+                    pieces.append((chunk.get("delta") or {}).get("text") or "")
+            return "".join(pieces).strip()
+        except Exception:
+            pass
+
+        # Buffered fallback (e.g. streaming not permitted for the model)
+        resp = await brt.invoke_model(
             modelId=MODEL_ID,
-            body=json.dumps(body),
+            body=orjson.dumps(body),
             contentType="application/json",
             accept="application/json",
         )
-        payload = json.loads(resp["body"].read().decode("utf-8"))
-        parts = payload.get("content") or []
-        for p in parts:
-            if p.get("type") == "text" and "text" in p:
-                return str(p["text"]).strip()
-        return str(payload).strip()
+        # Lazy parse on the raw bytes: walk content[*].text and skip the rest
+        # of the payload (usage stats, ids, ...) entirely.
+        buf = await resp["body"].read()
+        try:
+            doc = _SIMD_PARSER.parse(buf)
+            for p in doc["content"]:
+                if p["type"] == "text":
+                    return str(p["text"]).strip()
+        except (KeyError, TypeError, ValueError):
+            pass
+        return str(orjson.loads(buf)).strip()
     else:
         raise RuntimeError(
             f"Bedrock fallback implemented for Anthropic models only. MODEL_ID={MODEL_ID}"
         )
 
 
-def synthesize_with_strands(user_query: str, chunks: List[Dict[str, Any]], pre_baked: Optional[str]) -> str:
-    # Build references block for the LLM
-    ref_lines: List[str] = []
-    for i, ch in enumerate(chunks, start=1):
-        title = ch.get("title") or "Source"
-        url = ch.get("url") or ""
-        snippet = (ch.get("text") or "").replace("\n", " ")
-        ref_lines.append(f"[{i}] {title} {('- ' + url) if url else ''}\n{snippet[:400]}")
+async def synthesize_with_strands(user_query: str, chunks: List[Chunk], pre_baked: Optional[str]) -> str:
+    # Build references block for the LLM (preallocated, filled by index)
+    ref_lines: List[str] = [""] * len(chunks)
+    for idx, ch in enumerate(chunks):
+        i = idx + 1
+        title, url, text = ch.title or "Source", ch.url or "", ch.text
+        head = f"[{i}] {title} {('- ' + url) if url else ''}"
+        # Only the top chunks get their text inlined; the rest stay title-only
+        # references so low-ranked chunks don't inflate the prompt.
+        if i <= 3:
+            # Slice first so translate only touches the 400 chars that survive
+            snippet = (text or "")[:400].translate(_WS_TABLE)
+            ref_lines[idx] = f"{head}\n{snippet}"
+        else:
+            ref_lines[idx] = head
     refs = "\n\n".join(ref_lines) if ref_lines else "(no citations)"
 
-    baked = pre_baked or ""
-    prompt = (
-        "SYSTEM:\n" + SYSTEM_PROMPT + "\n\n"
-        f"USER QUESTION:\n{user_query}\n\n"
-        f"KB EXCERPTS:\n{refs}\n\n"
-        "If there is a pre-baked KB answer, it follows between <kb_answer> tags.\n"
-        f"<kb_answer>\n{baked}\n</kb_answer>\n\n"
-        "Write the best possible answer using ONLY the KB information. Keep it concise, and add inline [n] citations.\n"
+    # One join over the parts — no chain of intermediate concatenations
+    prompt = "".join(
+        (
+            _SYSTEM_HEADER,
+            "USER QUESTION:\n", user_query, "\n\n",
+            "KB EXCERPTS:\n", refs, "\n\n",
+            "If there is a pre-baked KB answer, it follows between <kb_answer> tags.\n",
+            "<kb_answer>\n", pre_baked or "", "\n</kb_answer>\n\n",
+            "Write the best possible answer using ONLY the KB information. Keep it concise, and add inline [n] citations.\n",
+        )
     )
 
-    # Preferred path: Strands callable Agent
+    # Known-bad Strands: go straight to the Bedrock fallback
+    if not _STRANDS_OK:
+        return await _bedrock_generate(prompt)
+
+    # Preferred path: Strands callable Agent (sync-only, so run in a worker
+    # thread to keep the event loop free for other invokes)
     try:
-        res = agent(prompt)
+        res = await asyncio.get_running_loop().run_in_executor(None, agent, prompt)
         # common return shapes: str, or object with .message
         if isinstance(res, str):
             return res.strip()
@@ -200,43 +442,127 @@ def synthesize_with_strands(user_query: str, chunks: List[Dict[str, Any]], pre_b
         return str(res).strip()
     except Exception:
         # Fallback to Bedrock Runtime if Strands call fails for any reason
-        return _bedrock_generate(prompt)
+        return await _bedrock_generate(prompt)
 
 
 # ---------------- AgentCore entrypoint ----------------
 app = BedrockAgentCoreApp()
 
 
-def _sign_payload(secret: str, body: str) -> str:
-    mac = hmac.new(secret.encode("utf-8"), body.encode("utf-8"), hashlib.sha256).hexdigest()
-    return f"sha256={mac}"
+# Shared client so repeat callbacks reuse the TCP+TLS connection; HTTP/2
+# multiplexes concurrent webhook dispatches on a single connection instead of
+# opening one per inflight request.
+_HTTPX = httpx.Client(
+    http2=True,
+    limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+    transport=httpx.HTTPTransport(retries=2),
+    headers={"Content-Type": "application/json"},
+    timeout=15,
+)
+
+
+# The secret is fixed for the process lifetime, so the HMAC key schedule
+# (ipad/opad expansion) is done once here; per-webhook signing just clones it.
+_WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")  # optional shared secret
+_HMAC_TEMPLATE = (
+    hmac.new(_WEBHOOK_SECRET.encode("utf-8"), b"", hashlib.sha256) if _WEBHOOK_SECRET else None
+)
+
+
+def _sign_payload(body: bytes) -> str:
+    mac = _HMAC_TEMPLATE.copy()
+    mac.update(body)
+    return f"sha256={mac.hexdigest()}"
+
+
+def _warm_callback_dns(host: Optional[str]) -> None:
+    """Best-effort DNS pre-resolve for the webhook host (populates the OS
+    cache). Failures are swallowed here — the delivery path does its own
+    lookup and reports its own errors."""
+    try:
+        if host:
+            socket.getaddrinfo(host, 443)
+    except Exception:
+        pass
 
 
 def _post_webhook(callback_url: str, result: dict) -> None:
-    body = json.dumps(result, separators=(",", ":"))
-    headers = {"Content-Type": "application/json"}
-    secret = os.getenv("WEBHOOK_SECRET")  # optional shared secret
-    if secret:
-        headers["X-Signature"] = _sign_payload(secret, body)
-    r = requests.post(callback_url, data=body, headers=headers, timeout=15)
+    # orjson emits compact bytes directly, skipping json.dumps + str.encode.
+    body = orjson.dumps(result)
+    headers = {"X-Signature": _sign_payload(body)} if _HMAC_TEMPLATE is not None else None
+    r = _HTTPX.post(callback_url, content=body, headers=headers)
     r.raise_for_status()
 
 
+# Callbacks are delivered off the request path so a slow consumer never stalls
+# the entrypoint; the ack goes back immediately.
+_WEBHOOK_POOL = ThreadPoolExecutor(max_workers=8)
+
+
+def _post_webhook_with_retry(callback_url: str, result: dict) -> None:
+    delay = 1.0
+    for attempt in range(3):
+        try:
+            _post_webhook(callback_url, result)
+            return
+        except Exception as e:
+            if attempt == 2:
+                print(f"[warn] webhook delivery to {callback_url} failed: {str(e)[:200]}")
+                return
+            time.sleep(delay)  # 1s, 2s backoff before the final try
+            delay *= 2
+
+
+class InvokePayload(msgspec.Struct):
+    """Request schema. msgspec validates and coerces all fields in one
+    C-level pass instead of per-field .get()/int()/float() calls; unknown
+    keys (e.g. UI-only knobs like "polish") are ignored. prompt/input are
+    Optional so an explicit JSON null coalesces instead of failing."""
+
+    prompt: Optional[str] = None
+    input: Optional[str] = None
+    top_k: int = TOP_K
+    min_score: float = MIN_SCORE
+    callback_url: Optional[str] = None
+    job_id: Optional[str] = None
+
+
 @app.entrypoint
-def invoke(payload: Dict[str, Any]) -> Dict[str, Any]:
+async def invoke(payload: Dict[str, Any]) -> Dict[str, Any]:
     # Inputs & knobs
-    query = (payload.get("prompt") or payload.get("input") or "").strip()
+    try:
+        p = msgspec.convert(payload, InvokePayload, strict=False)
+    except msgspec.ValidationError as e:
+        return {"error": f"Invalid payload: {e}"}
+
+    query = (p.prompt or p.input or "").strip()
     if not query:
         return {"error": "Missing 'prompt' in payload"}
 
-    top_k = int(payload.get("top_k", TOP_K))
-    min_score = float(payload.get("min_score", MIN_SCORE))
-    callback_url = payload.get("callback_url")  # optional
-    job_id = payload.get("job_id") or str(uuid.uuid4())
+    top_k = p.top_k
+    min_score = p.min_score
+
+    # Kick off retrieval right away; the prep below (ids, cache key, webhook
+    # DNS warm-up) runs while the Bedrock round trip is in flight.
+    retrieve_task = asyncio.create_task(kb_retrieve(query, top_k=top_k, min_score=min_score))
 
-    # Retrieve from KB
-    ret = kb_retrieve(query, top_k=top_k, min_score=min_score)
-    chunks: List[Dict[str, Any]] = ret["chunks"]
+    callback_url = p.callback_url  # optional
+    # Same entropy as uuid4 without the UUID object/format overhead.
+    job_id = p.job_id or secrets.token_hex(16)
+    qkey = _query_cache_key(query, top_k, min_score)
+    if callback_url:
+        try:
+            # The wrapper swallows lookup failures itself; the returned future
+            # is deliberately dropped, so it must never carry an exception.
+            asyncio.get_running_loop().run_in_executor(
+                None, _warm_callback_dns, httpx.URL(callback_url).host
+            )
+        except Exception:
+            pass
+
+    ret = await retrieve_task
+    # Near-duplicates from the same source add tokens without adding signal
+    chunks: List[Chunk] = _dedupe_chunks(ret["chunks"])
     pre = ret.get("rag_text")  # may be None when using pure retrieve
 
     # No results path
@@ -249,30 +575,27 @@ def invoke(payload: Dict[str, Any]) -> Dict[str, Any]:
             "mode": ret.get("mode"),
             "top_k": top_k,
             "min_score": min_score,
-            "ts": int(time.time()),
+            "ts": _NOW[0],
         }
         if callback_url:
-            try:
-                _post_webhook(callback_url, result)
-                return {"accepted": True, "job_id": job_id}
-            except Exception as e:
-                result["callback_error"] = str(e)[:200]
+            _WEBHOOK_POOL.submit(_post_webhook_with_retry, callback_url, result)
+            return {"accepted": True, "job_id": job_id}
         return result
 
-    # Synthesis with Strands (with Bedrock fallback)
-    answer = synthesize_with_strands(query, chunks, pre)
-
-    # Compact citations
-    citations = []
-    for i, ch in enumerate(chunks, start=1):
-        citations.append(
-            {
-                "ref": i,
-                "title": ch.get("title") or "Source",
-                "url": ch.get("url"),
-                "score": ch.get("score"),
-            }
-        )
+    # Synthesis with Strands (with Bedrock fallback); repeated prompts reuse
+    # the cached answer+citations and skip the LLM call entirely.
+    cached_answer = _answer_cache.get(qkey)
+    if cached_answer is not None:
+        answer, citations = cached_answer
+    else:
+        answer = await synthesize_with_strands(query, chunks, pre)
+
+        # Compact citations (dicts here only, so the response stays plain JSON)
+        citations = [
+            {"ref": i, "title": ch.title or "Source", "url": ch.url, "score": ch.score}
+            for i, ch in enumerate(chunks, start=1)
+        ]
+        _answer_cache.set(qkey, (answer, citations))
 
     # Final result
     result = {
@@ -283,17 +606,13 @@ def invoke(payload: Dict[str, Any]) -> Dict[str, Any]:
         "mode": ret.get("mode"),
         "top_k": top_k,
         "min_score": min_score,
-        "ts": int(time.time()),
+        "ts": _NOW[0],
     }
 
-    # Optional webhook callback
+    # Optional webhook callback (delivered in the background)
     if callback_url:
-        try:
-            _post_webhook(callback_url, result)
-            return {"accepted": True, "job_id": job_id}
-        except Exception as e:
-            result["callback_error"] = str(e)[:200]
-            return result
+        _WEBHOOK_POOL.submit(_post_webhook_with_retry, callback_url, result)
+        return {"accepted": True, "job_id": job_id}
 
     # Inline response (no webhook)
     return result
@@ -4,7 +4,8 @@ import os
 import sys
 import time
 import json
-from typing import Dict, Any, List
+import random
+from typing import Dict, Any, Iterator, List
 
 import boto3
 from botocore.config import Config
@@ -13,6 +14,14 @@ REGION = os.getenv("AWS_REGION", os.getenv("AWS_DEFAULT_REGION", "eu-central-1")
 USE_SSM = os.getenv("USE_SSM_PARAMS", "1") == "1"
 SSM_PREFIX = os.getenv("SSM_PARAM_PREFIX")  # defaults to /{account}-{region}/kb
 
+# Module-level client so the ingestion poll loop reuses one TLS session
+# instead of re-handshaking per call.
+agent = boto3.client(
+    "bedrock-agent",
+    region_name=REGION,
+    config=Config(retries={"max_attempts": 3, "mode": "adaptive"}, tcp_keepalive=True),
+)
+
 
 def resolve_ids() -> Dict[str, str]:
     sts = boto3.client("sts")
@@ -22,8 +31,13 @@ def resolve_ids() -> Dict[str, str]:
     if USE_SSM:
         ssm = boto3.client("ssm", region_name=region)
         prefix = SSM_PREFIX or f"/{account_id}-{region}/kb"
-        kb_id = ssm.get_parameter(Name=f"{prefix}/knowledge-base-id")["Parameter"]["Value"]
-        ds_id = ssm.get_parameter(Name=f"{prefix}/data-source-id")["Parameter"]["Value"]
+        # One batched call instead of two sequential round trips
+        names = [f"{prefix}/knowledge-base-id", f"{prefix}/data-source-id"]
+        resp = ssm.get_parameters(Names=names)
+        if resp.get("InvalidParameters"):
+            raise RuntimeError(f"Missing SSM parameters: {resp['InvalidParameters']}")
+        vals = {p["Name"]: p["Value"] for p in resp["Parameters"]}
+        kb_id, ds_id = vals[names[0]], vals[names[1]]
         bucket = f"{account_id}-{region}-kb-data-bucket"
         return {"kb_id": kb_id, "ds_id": ds_id, "bucket": bucket, "region": region}
 
@@ -35,17 +49,18 @@ def resolve_ids() -> Dict[str, str]:
     bucket = os.getenv("S3_BUCKET", f"{account_id}-{region}-kb-data-bucket")
     return {"kb_id": kb_id, "ds_id": ds_id, "bucket": bucket, "region": region}
 
-def list_bucket_objects(bucket: str) -> List[str]:
+def iter_bucket_objects(bucket: str) -> Iterator[str]:
+    """Stream object keys page by page: no 1000-key cap, O(page) memory."""
     s3 = boto3.client("s3", region_name=REGION)
     try:
-        resp = s3.list_objects_v2(Bucket=bucket)
-        return [o["Key"] for o in resp.get("Contents", [])]
+        paginator = s3.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=bucket, PaginationConfig={"PageSize": 1000}):
+            for o in page.get("Contents", []):
+                yield o["Key"]
     except Exception as e:
         print(f"[warn] could not list bucket {bucket}: {e}")
-        return []
 
-def start_and_wait_ingestion(kb_id: str, ds_id: str, *, description: str = "Quick sync", poll_seconds: int = 10) -> Dict[str, Any]:
-    agent = boto3.client("bedrock-agent", region_name=REGION, config=Config(retries={"max_attempts": 3, "mode": "adaptive"}))
+def start_and_wait_ingestion(kb_id: str, ds_id: str, *, description: str = "Quick sync", poll_cap: float = 30.0) -> Dict[str, Any]:
     resp = agent.start_ingestion_job(
         knowledgeBaseId=kb_id,
         dataSourceId=ds_id,
@@ -54,6 +69,10 @@ def start_and_wait_ingestion(kb_id: str, ds_id: str, *, description: str = "Quic
     job_id = resp["ingestionJob"]["ingestionJobId"]
     print(f"[info] started ingestion job {job_id}")
 
+    # Exponential backoff: short jobs are detected within seconds, long jobs
+    # aren't hammered with redundant get_ingestion_job calls. A little jitter
+    # keeps parallel syncs from polling in lockstep.
+    delay = 1.0
     while True:
         job = agent.get_ingestion_job(
             knowledgeBaseId=kb_id,
@@ -64,7 +83,8 @@ def start_and_wait_ingestion(kb_id: str, ds_id: str, *, description: str = "Quic
         print(f"[info] job {job_id} status: {status}")
         if status in ("COMPLETE", "FAILED", "STOPPED"):
             return job
-        time.sleep(poll_seconds)
+        time.sleep(delay + random.uniform(0, delay * 0.1))
+        delay = min(poll_cap, delay * 2)
 
 def main(argv: List[str]) -> int:
     do_list = "--list-s3" in argv
@@ -74,11 +94,12 @@ def main(argv: List[str]) -> int:
     kb_id, ds_id, bucket = ids["kb_id"], ids["ds_id"], ids["bucket"]
 
     if do_list:
-        files = list_bucket_objects(bucket)
-        if files:
-            print(f"[info] {bucket} contains {len(files)} objects:")
-            for k in files:
-                print("  -", k)
+        count = 0
+        for k in iter_bucket_objects(bucket):
+            print("  -", k)
+            count += 1
+        if count:
+            print(f"[info] {bucket} contains {count} objects")
         else:
             print(f"[info] no objects found or listing failed for {bucket}")
 
@@ -0,0 +1,402 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import socket
+import threading
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+import aioboto3
+import boto3
+from botocore.config import Config
+from cachetools import TTLCache
+import orjson
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from langdetect import detect
+
+# -----------------------------
+# Config / Env
+# -----------------------------
+REGION = os.getenv("AWS_REGION", os.getenv("AWS_DEFAULT_REGION", "eu-central-1"))
+PORT = int(os.getenv("MCP_PORT", "8081"))
+TOP_K = int(os.getenv("TOP_K", "8"))
+MIN_SCORE = float(os.getenv("MIN_SCORE", "0.0"))
+CACHE_TTL = int(os.getenv("CACHE_TTL", "300"))
+SNIPPET_LEN = int(os.getenv("SNIPPET_LEN", "400"))
+
+# KB registry: logical key -> KB id. Extend here when a new KB comes online.
+# `general-docs` falls back to the agent's KB_ID so a single-KB setup keeps working.
+KBS: Dict[str, Optional[str]] = {
+    "general-docs": os.getenv("KB_ID_GENERAL", os.getenv("KB_ID")),
+    "cs-support": os.getenv("KB_ID_SUPPORT"),
+}
+
+_BOTO_CONFIG = Config(
+    retries={"max_attempts": 3, "mode": "adaptive"},
+    max_pool_connections=50,
+    tcp_keepalive=True,
+)
+
+# Sync client kept as a fallback (health checks, running outside the lifespan).
+runtime = boto3.client("bedrock-agent-runtime", region_name=REGION, config=_BOTO_CONFIG)
+s3 = boto3.client("s3", region_name=REGION, config=_BOTO_CONFIG)
+
+# Async client held open for the process lifetime; lets one worker multiplex
+# many inflight retrievals instead of parking a thread per request.
+_aio_session = aioboto3.Session()
+_aio_runtime: Any = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _aio_runtime
+    async with _aio_session.client(
+        "bedrock-agent-runtime", region_name=REGION, config=_BOTO_CONFIG
+    ) as client:
+        _aio_runtime = client
+        # Pre-warm endpoint/DNS resolution so the first real request after a
+        # fork doesn't pay the cold-start tax.
+        try:
+            host = client.meta.endpoint_url.split("//", 1)[-1].split("/", 1)[0]
+            await asyncio.to_thread(socket.getaddrinfo, host, 443)
+        except Exception:
+            pass
+        yield
+    _aio_runtime = None
+
+
+# orjson serializes the kilobytes of chunk text per response in C instead of
+# pure-Python json.dumps, and emits bytes directly.
+app = FastAPI(title="KB MCP Server", default_response_class=ORJSONResponse, lifespan=lifespan)
+
+# Repeated prompts skip the Bedrock round trip entirely; the retrieve call
+# dominates end-to-end latency, so hits come back in sub-millisecond time.
+_RETRIEVE_CACHE: TTLCache = TTLCache(maxsize=512, ttl=CACHE_TTL)
+_RETRIEVE_LOCK = threading.Lock()
+
+
+# -----------------------------
+# Language detection / routing
+# -----------------------------
+def _normalize_lang(code: Optional[str]) -> str:
+    """Collapse langdetect output (e.g. 'en', 'zh-cn') to a bare ISO 639-1 code."""
+    return (code or "en").split("-", 1)[0].lower() or "en"
+
+
+@lru_cache(maxsize=2048)
+def _detect_lang_cached(text: str) -> str:
+    # langdetect rebuilds n-gram profiles per call, which dominates CPU for
+    # short prompts; caching makes repeated queries near-free.
+    try:
+        return _normalize_lang(detect(text))
+    except Exception:
+        return "en"
+
+
+def _detect_lang(text: str) -> str:
+    """Best-effort language guess for a query; cached since prompts repeat a lot."""
+    text = (text or "").strip()
+    if not text:
+        return "en"
+    # Pure-ASCII text is overwhelmingly English in our KBs; str.isascii() is a
+    # single C-level scan, so the common case skips langdetect entirely.
+    if text.isascii():
+        return "en"
+    # Truncate the cache key: bounds memory and improves the hit rate for
+    # prompts that share a long common prefix.
+    return _detect_lang_cached(text[:256])
+
+
+# Signals that a query is a support/troubleshooting question rather than a docs lookup.
+_SUPPORT_SIGNALS = (
+    "issue",
+    "error",
+    "failed",
+    "failing",
+    "cannot",
+    "can't",
+    "crash",
+    "bug",
+    "broken",
+    "not working",
+    "doesn't work",
+    "timeout",
+    "stuck",
+    "ticket",
+    "support",
+)
+
+# One C-level scan beats a Python loop of `in` checks, and IGNORECASE spares
+# the .lower() copy. Built from the tuple so the signal list stays declarative.
+_SUPPORT_RE = re.compile(
+    r"\b(?:" + "|".join(re.escape(s) for s in _SUPPORT_SIGNALS) + r")\b",
+    re.IGNORECASE,
+)
+
+
+def _auto_route_kb(text: str) -> str:
+    """Pick a KB for the query: support-looking questions go to cs-support,
+    but only when that KB is actually configured — a single-KB setup routes
+    everything to general-docs."""
+    if KBS.get("cs-support") and _SUPPORT_RE.search(text or ""):
+        return "cs-support"
+    return "general-docs"
+
+
+# -----------------------------
+# KB helpers
+# -----------------------------
+# Fixed at import time; the KB registry doesn't change while running.
+_KB_KEYS: List[str] = [key for key, kb_id in KBS.items() if kb_id]
+
+
+# Slots avoid a per-item __dict__; the encoder turns these back into JSON
+# objects at the response boundary.
+@dataclass(slots=True)
+class KBItem:
+    snippet: str
+    score: Optional[float]
+    title: Optional[str]
+    url: Optional[str]
+    source_uri: Optional[str]  # s3://... handle, resolvable via kb.fetch_chunk
+
+
+def _clean_item(it: Dict[str, Any]) -> KBItem:
+    """Flatten one Bedrock retrievalResult into the shape the agent expects.
+
+    Only a short snippet travels with the result; the full text stays behind
+    the source_uri handle so prompts don't pay tokens for chunks the model
+    never cites.
+    """
+    md = it.get("metadata") or {}
+    content = it.get("content") or {}
+    loc = (it.get("location") or {}).get("s3Location") or {}
+    return KBItem(
+        snippet=(content.get("text") or "")[:SNIPPET_LEN],
+        score=it.get("score"),
+        title=md.get("title") or md.get("file") or md.get("source"),
+        url=md.get("url") or md.get("source"),
+        source_uri=loc.get("uri") or md.get("x-amz-bedrock-kb-source-uri"),
+    )
+
+
+def _fetch_chunk(uri: str) -> str:
+    """Resolve a source_uri handle to the full document text."""
+    if not uri.startswith("s3://"):
+        raise HTTPException(status_code=400, detail=f"Unsupported handle '{uri}'")
+    bucket, _, key = uri[len("s3://"):].partition("/")
+    obj = s3.get_object(Bucket=bucket, Key=key)
+    return obj["Body"].read().decode("utf-8", "replace")
+
+
+# -----------------------------
+# MCP routes
+# -----------------------------
+# The tool schema never changes at runtime, so it's serialized once at import
+# and /mcp/tools is served as a straight memory copy.
+_TOOLS_BYTES = orjson.dumps(
+    {
+        "tools": [
+            {
+                "name": "kb.search",
+                "description": (
+                    "Search a Bedrock Knowledge Base and return the top matching "
+                    "chunks with scores and source metadata."
+                ),
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "query": {"type": "string"},
+                        "kb_id": {"type": "string", "enum": _KB_KEYS},
+                        "top_k": {"type": "integer", "default": TOP_K},
+                        "min_score": {"type": "number", "default": MIN_SCORE},
+                    },
+                    "required": ["query"],
+                },
+            },
+            {
+                "name": "kb.multi_search",
+                "description": (
+                    "Search several Bedrock Knowledge Bases concurrently and return "
+                    "the matching chunks per KB. Defaults to all configured KBs."
+                ),
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "query": {"type": "string"},
+                        "kb_ids": {
+                            "type": "array",
+                            "items": {"type": "string", "enum": _KB_KEYS},
+                        },
+                        "top_k": {"type": "integer", "default": TOP_K},
+                        "min_score": {"type": "number", "default": MIN_SCORE},
+                    },
+                    "required": ["query"],
+                },
+            },
+            {
+                "name": "kb.fetch_chunk",
+                "description": (
+                    "Fetch the full source text behind a search result's "
+                    "source_uri handle."
+                ),
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "uri": {"type": "string"},
+                    },
+                    "required": ["uri"],
+                },
+            },
+        ]
+    }
+)
+
+
+@app.get("/health")
+def health() -> Dict[str, Any]:
+    return {"ok": True, "kbs": _KB_KEYS}
+
+
+@app.get("/mcp/tools")
+def list_tools() -> Response:
+    return Response(content=_TOOLS_BYTES, media_type="application/json")
+
+
+async def _search_kb(kb_key: str, query: str, top_k: int, min_score: float, lang: str) -> List[KBItem]:
+    """Run one (cached) KB retrieval and return the cleaned, filtered items."""
+    kb_id = KBS.get(kb_key)
+    if not kb_id:
+        raise HTTPException(status_code=400, detail=f"Unknown or unconfigured KB '{kb_key}'")
+
+    cache_key = (kb_key, query.lower(), top_k, round(min_score, 3))
+    with _RETRIEVE_LOCK:
+        cached = _RETRIEVE_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    kwargs = dict(
+        knowledgeBaseId=kb_id,
+        retrievalQuery={"text": query},
+        retrievalConfiguration={"vectorSearchConfiguration": {"numberOfResults": top_k}},
+    )
+    if _aio_runtime is not None:
+        resp = await _aio_runtime.retrieve(**kwargs)
+    else:
+        # No lifespan (e.g. direct calls in tests): fall back to the sync client
+        # in a worker thread so the event loop stays free.
+        resp = await asyncio.to_thread(runtime.retrieve, **kwargs)
+    results = resp.get("retrievalResults") or []
+    # No server-side score threshold on retrieve; results are score-ordered,
+    # so clean until the first item under min_score and skip the rest.
+    results.sort(key=lambda r: r.get("score") or 0.0, reverse=True)
+    # Single sweep: clean, score-filter and lang-filter without intermediate
+    # lists. Support tickets mix languages all the time, so cs-support skips
+    # the lang check entirely.
+    check_lang = kb_key != "cs-support"
+    items: List[KBItem] = []
+    for raw in results:
+        score = raw.get("score")
+        if score is not None and score < min_score:
+            break
+        it = _clean_item(raw)
+        if check_lang and it.snippet and _detect_lang(it.snippet) != lang:
+            continue
+        items.append(it)
+
+    with _RETRIEVE_LOCK:
+        _RETRIEVE_CACHE[cache_key] = items
+
+    return items
+
+
+@app.post("/mcp/call")
+async def call_tool(req: Dict[str, Any]) -> Dict[str, Any]:
+    name = req.get("name")
+    args = req.get("arguments") or {}
+    if name not in ("kb.search", "kb.multi_search", "kb.fetch_chunk"):
+        raise HTTPException(status_code=404, detail=f"Unknown tool '{name}'")
+
+    if name == "kb.fetch_chunk":
+        uri = (args.get("uri") or "").strip()
+        if not uri:
+            raise HTTPException(status_code=400, detail="Missing 'uri' in arguments")
+        text = await asyncio.to_thread(_fetch_chunk, uri)
+        return {"uri": uri, "text": text}
+
+    query = (args.get("query") or "").strip()
+    if not query:
+        raise HTTPException(status_code=400, detail="Missing 'query' in arguments")
+
+    top_k = int(args.get("top_k", TOP_K))
+    min_score = float(args.get("min_score", MIN_SCORE))
+    lang = _detect_lang(query)
+
+    if name == "kb.multi_search":
+        kb_keys = list(args.get("kb_ids") or _KB_KEYS)
+        # Retrieval is network-bound, so querying the KBs concurrently collapses
+        # N round trips into roughly one wall-clock latency.
+        results = await asyncio.gather(
+            *(_search_kb(k, query, top_k, min_score, lang) for k in kb_keys)
+        )
+        return {
+            "lang": lang,
+            "results": [{"kb": k, "items": items} for k, items in zip(kb_keys, results)],
+        }
+
+    kb_key = args.get("kb_id") or _auto_route_kb(query)
+    items = await _search_kb(kb_key, query, top_k, min_score, lang)
+    return {"kb": kb_key, "lang": lang, "items": items}
+
+
+@app.post("/mcp/call/stream")
+async def call_tool_stream(req: Dict[str, Any]) -> StreamingResponse:
+    """SSE variant of kb.search: items are pushed one per event so the caller
+    can start prompting the LLM on the first chunk instead of waiting for the
+    whole payload to serialize."""
+    name = req.get("name")
+    args = req.get("arguments") or {}
+    if name != "kb.search":
+        raise HTTPException(status_code=404, detail=f"Unknown tool '{name}'")
+
+    query = (args.get("query") or "").strip()
+    if not query:
+        raise HTTPException(status_code=400, detail="Missing 'query' in arguments")
+
+    top_k = int(args.get("top_k", TOP_K))
+    min_score = float(args.get("min_score", MIN_SCORE))
+    lang = _detect_lang(query)
+    kb_key = args.get("kb_id") or _auto_route_kb(query)
+
+    # Retrieve before the response starts: an unconfigured KB or a Bedrock
+    # failure must surface as a 4xx/5xx, not a truncated stream. The retrieve
+    # is a single round trip anyway; streaming only spreads out serialization.
+    items = await _search_kb(kb_key, query, top_k, min_score, lang)
+
+    async def gen():
+        yield f"event: meta\ndata: {orjson.dumps({'kb': kb_key, 'lang': lang}).decode()}\n\n"
+        for it in items:
+            yield f"data: {orjson.dumps(it).decode()}\n\n"
+        yield "event: done\ndata: {}\n\n"
+
+    return StreamingResponse(gen(), media_type="text/event-stream")
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # Import-string form so --workers can fork; each worker re-imports the
+    # module and gets its own boto3 clients (no sockets shared across forks).
+    uvicorn.run(
+        "src.mcp_server:app",
+        host="0.0.0.0",
+        port=PORT,
+        workers=int(os.getenv("WEB_CONCURRENCY", "4")),
+        loop="uvloop",
+        http="httptools",
+    )